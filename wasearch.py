@@ -5,15 +5,26 @@ import json
 import sqlite3
 import os
 import sys
+import hashlib
 import html
 import webbrowser
-from datetime import datetime, timedelta
-from itertools import groupby
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import chain, groupby, islice, repeat
 from operator import itemgetter
-from urllib.parse import quote
 
 
 my_time_zone = "America/Mexico_City"
+INSERT_BATCH_SIZE = 10000
+# Stored in PRAGMA user_version; bump whenever the messages table changes so old databases get rebuilt.
+SCHEMA_VERSION = 3
+MESSAGE_COLUMNS = ('contact_name', 'timestamp', 'message_date', 'local_time', 'from_me', 'sender_name', 'text')
+# Exports up to this size are parsed in one go with orjson when available; larger ones are streamed with ijson.
+ORJSON_MAX_FILE_SIZE = 256 << 20
+# Rows per multi-row INSERT; SQLite builds older than 3.32 allow at most 999 bound parameters per statement.
+ROWS_PER_INSERT = 999 // len(MESSAGE_COLUMNS)
 
 try:
     from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
@@ -23,12 +34,164 @@ except ImportError:
     print("pip install tzdata", file=sys.stderr)
     sys.exit(1)
 
+try:
+    import ijson
+    json_errors = (json.JSONDecodeError, ijson.JSONError)
+except ImportError:
+    ijson = None
+    json_errors = (json.JSONDecodeError,)
+
+try:
+    import orjson  # orjson.JSONDecodeError subclasses json.JSONDecodeError, so json_errors covers it
+except ImportError:
+    orjson = None
+
+
+def iter_chats(json_file_path):
+    """
+    Yields the chats of a JSON chat log one at a time.
+    orjson parses files up to ORJSON_MAX_FILE_SIZE fastest; past that, or without orjson, ijson
+    streams the file so only one chat is held in memory. Plain json is the last resort.
+    """
+    if orjson is not None and (ijson is None or os.path.getsize(json_file_path) <= ORJSON_MAX_FILE_SIZE):
+        with open(json_file_path, 'rb') as f:
+            data = orjson.loads(f.read())
+        yield from data.get('chats', [])
+    elif ijson is None:
+        with open(json_file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        yield from data.get('chats', [])
+    else:
+        with open(json_file_path, 'rb') as f:
+            yield from ijson.items(f, 'chats.item')
+
+
+@lru_cache(maxsize=None)
+def local_time_zone():
+    """Returns the ZoneInfo for my_time_zone, resolved once per run."""
+    try:
+        return ZoneInfo(my_time_zone)
+    except ZoneInfoNotFoundError:
+        print(f"Error: Timezone '{my_time_zone}' not found. Please run 'pip install tzdata'.", file=sys.stderr)
+        sys.exit(1)
+
+
+@lru_cache(maxsize=None)
+def local_start_of_utc_hour(hour_str, tz_info):
+    """
+    Returns (date ordinal, minutes past midnight) in tz_info at the start of the UTC hour 'YYYY-MM-DDTHH',
+    or None if the UTC offset changes during that hour.
+    """
+    utc_start = datetime(int(hour_str[0:4]), int(hour_str[5:7]), int(hour_str[8:10]), int(hour_str[11:13]), tzinfo=timezone.utc)
+    offset = utc_start.astimezone(tz_info).utcoffset()
+    if (utc_start + timedelta(minutes=59)).astimezone(tz_info).utcoffset() != offset:
+        return None
+    local_start = (utc_start + offset).replace(tzinfo=None)
+    return local_start.toordinal(), local_start.hour * 60 + local_start.minute
+
+
+def local_date_and_minutes(timestamp_str, tz_info):
+    """
+    Converts a UTC timestamp ('YYYY-MM-DDTHH:MM:SSZ') to (local date ordinal, minutes past local midnight).
+    The offset is looked up once per UTC hour, so the common path is string slicing and integer math.
+    """
+    hour_start = local_start_of_utc_hour(timestamp_str[:13], tz_info)
+    if hour_start is None:
+        local_time = datetime.fromisoformat(timestamp_str.replace('Z', '+00:00')).astimezone(tz_info)
+        return local_time.toordinal(), local_time.hour * 60 + local_time.minute
+    ordinal, minutes = hour_start
+    minutes += int(timestamp_str[14:16])
+    if minutes >= 1440:
+        return ordinal + 1, minutes - 1440
+    return ordinal, minutes
+
+
+@lru_cache(maxsize=1440)
+def format_time_of_day(minutes):
+    hour, minute = divmod(minutes, 60)
+    return f"{hour % 12 or 12}:{minute:02d} {'AM' if hour < 12 else 'PM'}"
+
+
+def short_sender_name(raw_sender):
+    if not raw_sender: return 'Unknown Sender'
+    if '@s.whatsapp.net' in raw_sender: return 'Them'
+    return raw_sender.split(' ', 1)[0]
+
 
-def convert_json_to_sqlite(json_file_path):
+def iter_message_rows(chats, tz_info):
+    """Yields a row (in MESSAGE_COLUMNS order) for every text message in the chats, skipping everything else."""
+    for chat in chats:
+        contact_name = chat.get('contactName')
+        if not contact_name: continue
+        is_group_chat = chat.get('key', '').endswith('@g.us')
+        # Senders repeat a lot within a chat, so each raw name is shortened only once.
+        sender_names = {}
+        for message in chat.get('messages', []):
+            if message.get('type') != 'text' or 'text' not in message: continue
+            try:
+                timestamp_str = message['timestamp']
+                message_date, minutes = local_date_and_minutes(timestamp_str, tz_info)
+                local_time = format_time_of_day(minutes)
+                from_me = message.get('fromMe', False)
+
+                if from_me:
+                    sender_name = 'Me'
+                else:
+                    raw_sender = message.get('remoteResourceDisplayName') if is_group_chat else contact_name
+                    sender_name = sender_names.get(raw_sender)
+                    if sender_name is None:
+                        sender_name = sender_names[raw_sender] = short_sender_name(raw_sender)
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping a message due to missing data: {e}", file=sys.stderr)
+                continue
+            yield contact_name, timestamp_str, message_date, local_time, from_me, sender_name, message['text']
+
+
+def chat_message_rows(chat, tz_info):
+    """Returns the insert rows for a single chat; runs in a worker process when converting with --jobs."""
+    return list(iter_message_rows([chat], tz_info))
+
+
+def iter_message_rows_parallel(chats, tz_info, jobs):
+    """
+    Same rows, in the same order, as iter_message_rows, but each chat is prepared in a pool of worker processes.
+    Only a couple of chats per worker are in flight at once, so a streamed JSON file stays streamed.
+    """
+    workers = jobs or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = deque()
+        for chat in chats:
+            pending.append(executor.submit(chat_message_rows, chat, tz_info))
+            if len(pending) >= 2 * workers:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def insert_message_rows(cursor, rows):
+    """
+    Inserts message tuples (in MESSAGE_COLUMNS order) using multi-row INSERT statements,
+    which SQLite executes noticeably faster than the same rows one statement at a time.
+    """
+    insert_sql = f"INSERT INTO messages ({', '.join(MESSAGE_COLUMNS)}) VALUES "
+    row_placeholders = '(' + ', '.join('?' * len(MESSAGE_COLUMNS)) + ')'
+    multi_row_sql = insert_sql + ', '.join([row_placeholders] * ROWS_PER_INSERT)
+    full_statements_end = len(rows) - len(rows) % ROWS_PER_INSERT
+    for start in range(0, full_statements_end, ROWS_PER_INSERT):
+        cursor.execute(multi_row_sql, list(chain.from_iterable(rows[start:start + ROWS_PER_INSERT])))
+    cursor.executemany(insert_sql + row_placeholders, rows[full_statements_end:])
+
+
+def convert_json_to_sqlite(json_file_path, jobs=1):
     """
     Converts a JSON chat log to a SQLite database.
-    It stores the original UTC timestamp without a pre-calculated local date.
+    It stores the original UTC timestamp along with the message's local date (as a date ordinal)
+    and display time in my_time_zone, so searching never has to convert timestamps.
+    The database is therefore tied to that zone; after changing my_time_zone it has to be converted again.
+    With jobs other than 1, chats are prepared in that many worker processes (0 = one per CPU).
     """
+    local_tz = local_time_zone()
+
     db_file_path = os.path.splitext(json_file_path)[0] + '.db'
 
     if os.path.exists(db_file_path):
@@ -43,199 +206,238 @@ def convert_json_to_sqlite(json_file_path):
             print(f"Error: Could not remove existing database file: {e}", file=sys.stderr)
             sys.exit(1)
 
-    try:
-        print(f"Loading JSON file: {json_file_path}...")
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
-        print("JSON file loaded successfully.")
-    except (FileNotFoundError, json.JSONDecodeError) as e:
-        print(f"Error loading JSON file: {e}", file=sys.stderr)
-        sys.exit(1)
-
-    conn = sqlite3.connect(db_file_path)
+    print(f"Loading JSON file: {json_file_path}...")
+    # The database is built in memory and copied to disk in one go at the end,
+    # so the load never waits on the filesystem.
+    conn = sqlite3.connect(':memory:')
     cursor = conn.cursor()
     print(f"Creating database: {db_file_path}")
 
     cursor.execute("PRAGMA encoding = 'UTF-8';")
+    # No rollback journal during the load: a failed conversion is simply redone from the JSON file.
+    cursor.execute("PRAGMA journal_mode = OFF;")
+    cursor.execute("PRAGMA temp_store = MEMORY;")
+    cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
     cursor.execute('''
         CREATE TABLE messages (
             id INTEGER PRIMARY KEY AUTOINCREMENT, contact_name TEXT NOT NULL,
-            timestamp TEXT NOT NULL, from_me BOOLEAN NOT NULL,
+            timestamp TEXT NOT NULL, message_date INTEGER NOT NULL, local_time TEXT NOT NULL, from_me BOOLEAN NOT NULL,
             sender_name TEXT NOT NULL, text TEXT NOT NULL )
     ''')
-    cursor.execute('CREATE INDEX idx_timestamp ON messages (timestamp)')
+    # message_date and local_time are both worked out in my_time_zone here, so the zone is recorded
+    # and a search under a different zone asks for a fresh conversion instead of showing stale times.
+    cursor.execute("CREATE TABLE settings ( time_zone TEXT NOT NULL )")
+    cursor.execute("INSERT INTO settings (time_zone) VALUES (?)", (my_time_zone,))
 
     message_count = 0
-    for chat in data.get('chats', []):
-        contact_name = chat.get('contactName')
-        if not contact_name: continue
-        is_group_chat = chat.get('key', '').endswith('@g.us')
-        for message in chat.get('messages', []):
-            if message.get('type') == 'text' and 'text' in message:
-                try:
-                    timestamp_str = message['timestamp']
-                    from_me = message.get('fromMe', False)
-                    
-                    sender_name = 'Me' if from_me else (message.get('remoteResourceDisplayName') if is_group_chat else contact_name)
-                    if not from_me and sender_name:
-                        if '@s.whatsapp.net' in sender_name: sender_name = 'Them'
-                        elif ' ' in sender_name: sender_name = sender_name.split(' ', 1)[0]
-                    elif not sender_name: sender_name = 'Unknown Sender'
-
-                    cursor.execute(
-                        'INSERT INTO messages (contact_name, timestamp, from_me, sender_name, text) VALUES (?, ?, ?, ?, ?)',
-                        (contact_name, timestamp_str, from_me, sender_name, message['text'])
-                    )
-                    message_count += 1
-                except (KeyError, TypeError) as e:
-                    print(f"Skipping a message due to missing data: {e}", file=sys.stderr)
-
-    conn.commit()
+    if jobs == 1:
+        rows = iter_message_rows(iter_chats(json_file_path), local_tz)
+    else:
+        rows = iter_message_rows_parallel(iter_chats(json_file_path), local_tz, jobs)
+    # One transaction for the whole load; rows are pulled and inserted in batches to cap memory.
+    try:
+        with conn:
+            while batch := list(islice(rows, INSERT_BATCH_SIZE)):
+                insert_message_rows(cursor, batch)
+                message_count += len(batch)
+    except (FileNotFoundError, *json_errors) as e:
+        conn.close()
+        print(f"Error loading JSON file: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    # Building the index once over the loaded table is cheaper than maintaining it per insert.
+    # Covers every column the date search reads, so it is answered from the index alone.
+    cursor.execute('CREATE INDEX idx_message_date ON messages (message_date, contact_name, timestamp, local_time, from_me, text)')
+
+    disk_conn = sqlite3.connect(db_file_path)
+    conn.backup(disk_conn)
+    disk_conn.execute("PRAGMA journal_mode = WAL;")
+    disk_conn.close()
     conn.close()
     print(f"\nConversion complete. Inserted {message_count} messages into '{db_file_path}'.")
 
 
-def format_messages_for_display(messages, tz_info):
-    formatted = []
-    for msg in messages:
-        utc_time = datetime.fromisoformat(msg['timestamp'].replace('Z', '+00:00'))
-        local_time = utc_time.astimezone(tz_info)
-        time_str = local_time.strftime('%I:%M %p').lstrip('0')
-        safe_text = html.escape(msg['text']).replace('\n', '<br>')
-        formatted.append({'from_me': msg['from_me'], 'text': safe_text, 'time_str': time_str})
-    return formatted
+def render_messages(messages):
+    """Renders (local_time, from_me, text) rows as message bubbles, formatting and emitting each row in a single pass."""
+    html_parts = []
+    for time_str, from_me, text in messages:
+        text = html.escape(text).replace('\n', '<br>')
+        # One literal f-string per bubble kind: each compiles to a specialized string build, so no template is parsed per message.
+        if from_me:
+            html_parts.append(f"<div class='message sent'>{text}<span class='metadata'><span class='time'>{time_str}</span></span></div>")
+        else:
+            html_parts.append(f"<div class='message received'>{text}<span class='metadata'><span class='time'>{time_str}</span></span></div>")
+    return "".join(html_parts)
+
+
+def render_conversation(conv, day_labels):
+    """
+    Renders one conversation group as UTF-8 bytes; day_labels holds the (previous, search, next) day headings.
+    Top-level and fed only plain tuples so it can run in a worker process when searching with --jobs.
+    """
+    prev_label, current_label, next_label = day_labels
+    prev_messages_html = render_messages(conv['prev'])
+    curr_messages_html = render_messages(conv['current'])
+    next_messages_html = render_messages(conv['next'])
+
+    prev_msg_id, next_msg_id = f"prev-msg-{conv['slug']}", f"next-msg-{conv['slug']}"
+    initial_divider_html = f'<div class="day-divider"><span class="date-label">{current_label}</span></div>'
+    prev_divider_html = f'<div class="day-divider"><span class="date-label">{prev_label}</span></div>' if prev_messages_html else ""
+    next_divider_html = f'<div class="day-divider"><span class="date-label">{next_label}</span></div>' if next_messages_html else ""
+
+    return f"""
+        <div class="conversation_group">
+            <h2>
+                <span class="day-loader {'invisible' if not prev_messages_html else ''}" data-target="{prev_msg_id}">«</span>
+                {html.escape(conv['contact_name'])}
+                <span class="day-loader {'invisible' if not next_messages_html else ''}" data-target="{next_msg_id}">»</span>
+            </h2>
+            <div class="conversation-container">
+                <div id="{prev_msg_id}" class="collapsed">{prev_divider_html}{prev_messages_html}</div>
+                {initial_divider_html}{curr_messages_html}
+                <div id="{next_msg_id}" class="collapsed">{next_divider_html}{next_messages_html}</div>
+            </div>
+        </div>""".encode('utf-8')
+
+
+# Shared by every generated page; written once next to the output instead of being inlined into each file.
+STYLESHEET_FILE = 'wasearch.css'
+STYLESHEET = """html,body{font-family:"Roboto",sans-serif;margin:0;padding:0;background-color:#f0f0f0}h1,h2{color:#333;text-align:center;margin:20px 0}.conversation_group{background:#efe7dd url("https://cloud.githubusercontent.com/assets/398893/15136779/4e765036-1639-11e6-9201-67e728e86f39.jpg") repeat;padding:10px 20px;margin:20px auto;max-width:800px;border:1px solid #ccc;box-shadow:0 2px 5px rgba(0,0,0,.1);border-radius:8px}.conversation_group h2{color:#075e54;border-bottom:2px solid #128c7e;padding-bottom:10px;display:flex;justify-content:space-between;align-items:center}.conversation-container{overflow-x:hidden;padding:0 16px}.conversation-container::after{content:"";display:table;clear:both}.message{color:#000;clear:both;line-height:18px;font-size:15px;padding:8px;position:relative;margin:8px 0;max-width:85%;word-wrap:break-word;box-shadow:0 1px 1px rgba(0,0,0,.1)}.message::after{position:absolute;content:"";width:0;height:0;border-style:solid}.metadata{display:inline-block;float:right;padding:0 0 0 7px;position:relative;bottom:-4px}.metadata .time{color:rgba(0,0,0,.45);font-size:11px;display:inline-block}.message.received{background:#fff;border-radius:0 5px 5px 5px;float:left}.message.received::after{border-width:0 10px 10px 0;border-color:transparent #fff transparent transparent;top:0;left:-10px}.message.sent{background:#e1ffc7;border-radius:5px 0 5px 5px;float:right}.message.sent::after{border-width:0 0 10px 10px;border-color:transparent transparent transparent #e1ffc7;top:0;right:-10px}.day-loader{font-size:20px;font-weight:700;text-decoration:none;color:#075e54;cursor:pointer;padding:0 10px;user-select:none}.day-loader:hover{color:#128c7e}.invisible{visibility:hidden}.collapsed{display:none}.day-divider{text-align:center;margin:15px 0;clear:both}.date-label{background:#e1f2fb;color:#5e7a8c;padding:4px 12px;border-radius:12px;font-size:12px;font-weight:600}
+"""
+SCRIPT_FILE = 'wasearch.js'
+SCRIPT = """document.addEventListener('click', function(e) {
+    if (e.target.matches('.day-loader')) {
+        const targetId = e.target.getAttribute('data-target');
+        const targetEl = document.getElementById(targetId);
+        if (targetEl) {
+            targetEl.classList.remove('collapsed');
+            e.target.classList.add('invisible');
+        }
+    }
+});
+"""
+
 
+def write_sidecar(file_path, content):
+    """Writes a static asset unless an identical copy is already there."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if f.read() == content:
+                return
+    except FileNotFoundError:
+        pass
+    with open(file_path, 'w', encoding='utf-8') as f:
+        f.write(content)
 
-def search_chats_by_date(db_file_path, search_date_str):
+
+def search_chats_by_date(db_file_path, search_date_str, jobs=1):
+    """
+    Writes the conversations active on search_date_str (with the surrounding days) to an HTML page and opens it.
+    With jobs other than 1, conversations are rendered in that many worker processes (0 = one per CPU).
+    """
     if not os.path.exists(db_file_path):
         print(f"Error: Database file '{db_file_path}' not found.", file=sys.stderr)
         sys.exit(1)
 
     try:
-        local_tz = ZoneInfo(my_time_zone)
-        utc_tz = ZoneInfo("UTC")
         search_date_obj = datetime.strptime(search_date_str, '%Y-%m-%d')
     except (ValueError):
         print("Error: Invalid date format. Please use YYYY-MM-DD.", file=sys.stderr)
         sys.exit(1)
-    except ZoneInfoNotFoundError:
-        print("Error: Timezone 'America/Mexico_City' not found. Please run 'pip install tzdata'.", file=sys.stderr)
-        sys.exit(1)
         
-    # --- Correct Time Window Calculation ---
-    # Create timezone-aware start and end datetimes in the local timezone
-    # THIS IS THE CORRECTED LINE:
-    start_local = search_date_obj.replace(tzinfo=local_tz)
-    end_local = start_local + timedelta(days=1)
-    
-    windows = {
-        'prev': (start_local - timedelta(days=1), start_local),
-        'current': (start_local, end_local),
-        'next': (end_local, end_local + timedelta(days=1))
-    }
-    
-    utc_windows = {
-        key: (val[0].astimezone(utc_tz).isoformat().replace('+00:00', 'Z'), 
-              val[1].astimezone(utc_tz).isoformat().replace('+00:00', 'Z'))
-        for key, val in windows.items()
-    }
+    search_day = search_date_obj.toordinal()
 
+    # message_date is the local date ordinal stored at conversion, so the index does the day bucketing.
     conn = sqlite3.connect(db_file_path)
-    conn.row_factory = sqlite3.Row
-    query = "SELECT * FROM messages WHERE timestamp >= ? AND timestamp < ? ORDER BY contact_name, timestamp"
-    all_results = conn.execute(query, (utc_windows['prev'][0], utc_windows['next'][1])).fetchall()
-    conn.close()
-    
-    if not any(utc_windows['current'][0] <= r['timestamp'] < utc_windows['current'][1] for r in all_results):
+    if conn.execute("PRAGMA user_version;").fetchone()[0] != SCHEMA_VERSION:
+        conn.close()
+        print(f"Error: '{db_file_path}' was created by an older version of this script. Please re-run the conversion with -c.", file=sys.stderr)
+        sys.exit(1)
+    db_time_zone = conn.execute("SELECT time_zone FROM settings").fetchone()[0]
+    if db_time_zone != my_time_zone:
+        conn.close()
+        print(f"Error: '{db_file_path}' was converted for time zone '{db_time_zone}', not '{my_time_zone}'. Please re-run the conversion with -c.", file=sys.stderr)
+        sys.exit(1)
+
+    # A single index probe answers "anything that day?" before the three-day query is run.
+    if conn.execute("SELECT 1 FROM messages WHERE message_date = ? LIMIT 1", (search_day,)).fetchone() is None:
+        conn.close()
         print(f"No messages found for {search_date_str}")
         return
 
-    all_conversations = {}
-    for r in all_results:
-        contact, ts = r['contact_name'], r['timestamp']
-        if contact not in all_conversations:
-            all_conversations[contact] = {'prev': [], 'current': [], 'next': [], 'first_current_timestamp': None}
-        
-        if utc_windows['prev'][0] <= ts < utc_windows['prev'][1]: all_conversations[contact]['prev'].append(dict(r))
-        elif utc_windows['current'][0] <= ts < utc_windows['current'][1]:
-            all_conversations[contact]['current'].append(dict(r))
-            if not all_conversations[contact]['first_current_timestamp']: all_conversations[contact]['first_current_timestamp'] = ts
-        elif utc_windows['next'][0] <= ts < utc_windows['next'][1]: all_conversations[contact]['next'].append(dict(r))
-
-    conversations_to_render = [{'contact_name': name, **data} for name, data in all_conversations.items() if data['current']]
-    conversations_to_render.sort(key=lambda x: x['first_current_timestamp'])
+    # Only conversations with messages on the search date are returned, already in render order:
+    # by their first message of the day, then by time within the conversation.
+    query = """
+        SELECT contact_name, local_time, from_me, text, bucket FROM (
+            SELECT contact_name, timestamp, local_time, from_me, text,
+                   CASE message_date WHEN ? THEN 'prev' WHEN ? THEN 'current' ELSE 'next' END AS bucket,
+                   MIN(CASE WHEN message_date = ? THEN timestamp END) OVER (PARTITION BY contact_name) AS conversation_start
+            FROM messages WHERE message_date BETWEEN ? AND ?)
+        WHERE conversation_start IS NOT NULL
+        ORDER BY conversation_start, contact_name, timestamp"""
+    params = (search_day - 1, search_day, search_day, search_day - 1, search_day + 1)
+    all_results = conn.execute(query, params).fetchall()
+    conn.close()
 
-    for conv in conversations_to_render:
-        conv['prev_messages'] = format_messages_for_display(conv['prev'], local_tz)
-        conv['current_messages'] = format_messages_for_display(conv['current'], local_tz)
-        conv['next_messages'] = format_messages_for_display(conv['next'], local_tz)
-        conv['slug'] = quote(conv['contact_name'])
+    conversations_to_render = []
+    for contact, rows in groupby(all_results, key=itemgetter(0)):
+        slug = hashlib.blake2b(contact.encode('utf-8'), digest_size=8).hexdigest()
+        conv = {'contact_name': contact, 'slug': slug, 'prev': [], 'current': [], 'next': []}
+        for _, local_time, from_me, text, bucket in rows:
+            conv[bucket].append((local_time, from_me, text))
+        conversations_to_render.append(conv)
 
     output_filename = f"{os.path.splitext(os.path.basename(db_file_path))[0]}_{search_date_str}.html"
     human_readable_date = search_date_obj.strftime('%B %d, %Y')
     
-    html_template = """
+    html_head_template = """
     <!DOCTYPE html><html lang="en"><head><meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <link rel="stylesheet" href="https://fonts.googleapis.com/css?family=Roboto:400,600">
-    <title>Chat Logs for {human_readable_date}</title><style>
-    html,body{{font-family:"Roboto",sans-serif;margin:0;padding:0;background-color:#f0f0f0}}h1,h2{{color:#333;text-align:center;margin:20px 0}}.conversation_group{{background:#efe7dd url("https://cloud.githubusercontent.com/assets/398893/15136779/4e765036-1639-11e6-9201-67e728e86f39.jpg") repeat;padding:10px 20px;margin:20px auto;max-width:800px;border:1px solid #ccc;box-shadow:0 2px 5px rgba(0,0,0,.1);border-radius:8px}}.conversation_group h2{{color:#075e54;border-bottom:2px solid #128c7e;padding-bottom:10px;display:flex;justify-content:space-between;align-items:center}}.conversation-container{{overflow-x:hidden;padding:0 16px}}.conversation-container::after{{content:"";display:table;clear:both}}.message{{color:#000;clear:both;line-height:18px;font-size:15px;padding:8px;position:relative;margin:8px 0;max-width:85%;word-wrap:break-word;box-shadow:0 1px 1px rgba(0,0,0,.1)}}.message::after{{position:absolute;content:"";width:0;height:0;border-style:solid}}.metadata{{display:inline-block;float:right;padding:0 0 0 7px;position:relative;bottom:-4px}}.metadata .time{{color:rgba(0,0,0,.45);font-size:11px;display:inline-block}}.message.received{{background:#fff;border-radius:0 5px 5px 5px;float:left}}.message.received::after{{border-width:0 10px 10px 0;border-color:transparent #fff transparent transparent;top:0;left:-10px}}.message.sent{{background:#e1ffc7;border-radius:5px 0 5px 5px;float:right}}.message.sent::after{{border-width:0 0 10px 10px;border-color:transparent transparent transparent #e1ffc7;top:0;right:-10px}}.day-loader{{font-size:20px;font-weight:700;text-decoration:none;color:#075e54;cursor:pointer;padding:0 10px;user-select:none}}.day-loader:hover{{color:#128c7e}}.invisible{{visibility:hidden}}.collapsed{{display:none}}.day-divider{{text-align:center;margin:15px 0;clear:both}}.date-label{{background:#e1f2fb;color:#5e7a8c;padding:4px 12px;border-radius:12px;font-size:12px;font-weight:600}}
-    </style></head><body><h1>Chat Logs for {human_readable_date}</h1>{conversations_html}
-    <script>
-    document.addEventListener('click', function(e) {{
-        if (e.target.matches('.day-loader')) {{
-            const targetId = e.target.getAttribute('data-target');
-            const targetEl = document.getElementById(targetId);
-            if (targetEl) {{
-                targetEl.classList.remove('collapsed');
-                e.target.classList.add('invisible');
-            }}
-        }}
-    }});
-    </script></body></html>"""
-
-    message_template = "<div class='message {css_class}'>{text}<span class='metadata'><span class='time'>{time_str}</span></span></div>"
+    <title>Chat Logs for {human_readable_date}</title>
+    <link rel="stylesheet" href="{stylesheet}">
+    </head><body><h1>Chat Logs for {human_readable_date}</h1>"""
+    html_tail = f"""
+    <script src="{SCRIPT_FILE}"></script></body></html>"""
     
     prev_date_obj = search_date_obj - timedelta(days=1)
     next_date_obj = search_date_obj + timedelta(days=1)
     human_readable_prev_date = prev_date_obj.strftime('%B %d, %Y')
     human_readable_next_date = next_date_obj.strftime('%B %d, %Y')
 
-    conversations_html = []
-    for conv in conversations_to_render:
-        prev_messages_html = "".join([message_template.format(css_class='sent' if m['from_me'] else 'received', **m) for m in conv['prev_messages']])
-        curr_messages_html = "".join([message_template.format(css_class='sent' if m['from_me'] else 'received', **m) for m in conv['current_messages']])
-        next_messages_html = "".join([message_template.format(css_class='sent' if m['from_me'] else 'received', **m) for m in conv['next_messages']])
-        
-        prev_msg_id, next_msg_id = f"prev-msg-{conv['slug']}", f"next-msg-{conv['slug']}"
-        initial_divider_html = f'<div class="day-divider"><span class="date-label">{human_readable_date}</span></div>'
-        prev_divider_html = f'<div class="day-divider"><span class="date-label">{human_readable_prev_date}</span></div>' if prev_messages_html else ""
-        next_divider_html = f'<div class="day-divider"><span class="date-label">{human_readable_next_date}</span></div>' if next_messages_html else ""
-
-        conv_html = f"""
-        <div class="conversation_group">
-            <h2>
-                <span class="day-loader {'invisible' if not prev_messages_html else ''}" data-target="{prev_msg_id}">«</span>
-                {html.escape(conv['contact_name'])}
-                <span class="day-loader {'invisible' if not next_messages_html else ''}" data-target="{next_msg_id}">»</span>
-            </h2>
-            <div class="conversation-container">
-                <div id="{prev_msg_id}" class="collapsed">{prev_divider_html}{prev_messages_html}</div>
-                {initial_divider_html}{curr_messages_html}
-                <div id="{next_msg_id}" class="collapsed">{next_divider_html}{next_messages_html}</div>
-            </div>
-        </div>"""
-        conversations_html.append(conv_html)
-
-    final_html = html_template.format(human_readable_date=human_readable_date, conversations_html="".join(conversations_html))
+    day_labels = (human_readable_prev_date, human_readable_date, human_readable_next_date)
 
     try:
-        with open(output_filename, 'w', encoding='utf-8') as f: f.write(final_html)
+        # Stream the document out piece by piece so the full HTML is never held in memory;
+        # the 1 MiB buffer keeps that down to a handful of write() calls even for busy days.
+        # Fragments are encoded as they are rendered and written in binary mode, skipping the text layer.
+        # The page links its stylesheet and script relatively, so keep them beside it (refreshed if outdated).
+        write_sidecar(STYLESHEET_FILE, STYLESHEET)
+        write_sidecar(SCRIPT_FILE, SCRIPT)
+        with open(output_filename, 'wb', buffering=1 << 20) as f:
+            f.write(html_head_template.format(human_readable_date=human_readable_date, stylesheet=STYLESHEET_FILE).encode('utf-8'))
+            if jobs == 1:
+                f.writelines(render_conversation(conv, day_labels) for conv in conversations_to_render)
+            else:
+                # Results come back in submission order, so the page layout is unchanged.
+                with ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1) as executor:
+                    f.writelines(executor.map(render_conversation, conversations_to_render, repeat(day_labels), chunksize=8))
+            f.write(html_tail.encode('utf-8'))
         print(f"Successfully wrote chat log to '{output_filename}'")
         webbrowser.open_new_tab(f"file://{os.path.realpath(output_filename)}")
     except IOError as e:
         print(f"Error writing to file '{output_filename}': {e}", file=sys.stderr)
 
+def job_count(value):
+    """argparse type for --jobs: a worker process count, where 0 means one per CPU."""
+    try:
+        jobs = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid job count: '{value}'")
+    if jobs < 0:
+        raise argparse.ArgumentTypeError(f"job count must be 0 or more, got {jobs}")
+    return jobs
+
 def main():
     parser = argparse.ArgumentParser(
         description="A tool to convert and search WhatsApp chat logs.",
@@ -243,14 +445,15 @@ def main():
         formatter_class=argparse.RawTextHelpFormatter
     )
     parser.add_argument('-c', '--convert', dest='json_file', metavar='ChatLog.json', help='Convert the specified JSON file to a SQLite DB.')
+    parser.add_argument('-j', '--jobs', type=job_count, default=1, metavar='N', help='Worker processes to use for conversion and rendering (0 = one per CPU, default: 1).')
     parser.add_argument('db_file', nargs='?', help='The database file to search.')
     parser.add_argument('search_date', nargs='?', help='The date to search for (YYYY-MM-DD).')
     args = parser.parse_args()
 
     if args.json_file:
-        convert_json_to_sqlite(args.json_file)
+        convert_json_to_sqlite(args.json_file, args.jobs)
     elif args.db_file and args.search_date:
-        search_chats_by_date(args.db_file, args.search_date)
+        search_chats_by_date(args.db_file, args.search_date, args.jobs)
     else:
         parser.print_help()
 